@@ -1,14 +1,71 @@
-import json
+import asyncio
+import hashlib
 import logging
 import os
+import re
+import sqlite3
+import time
 import urllib.parse
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+import aiohttp
 import click
+import faiss
+import ijson
+import numpy as np
+import orjson
 import requests
-from bs4 import BeautifulSoup
+import sqlite_vec
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+    import lxml.etree
+    import lxml.html
+
+try:
+    from blake3 import blake3 as _chunk_hash
+except ImportError:
+    _chunk_hash = hashlib.sha256
+
+_WS_RE = re.compile(r"\s+")
+
+_HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+_NON_HTML_EXTENSIONS = (".pdf", ".zip", ".gz", ".mp3", ".mp4", ".mov", ".png", ".jpg")
+
+
+def _chunk_digest(chunk: str) -> bytes:
+    return _chunk_hash(chunk.encode()).digest()
+
+
+def _extract_body(content: bytes) -> Optional[str]:
+    if LexborHTMLParser is not None:
+        body_tag = LexborHTMLParser(content).body
+        if body_tag is None:
+            return None
+        body_text = body_tag.text(separator=" ")
+    else:
+        try:
+            tree = lxml.html.document_fromstring(
+                content, parser=lxml.html.HTMLParser(encoding="utf-8")
+            )
+        except lxml.etree.ParserError:
+            # raised for empty documents
+            return None
+        if tree.find("body") is None:
+            return None
+        # string() runs the text extraction inside libxml2
+        body_text = tree.xpath("string(//body)")
+    # lexbor adds an empty body to documents that have none, treat both alike
+    return _WS_RE.sub(" ", body_text).strip() or None
+
 
 def get_logger(log_level: str) -> logging.Logger:
     logger = logging.getLogger(__name__)
@@ -20,6 +77,292 @@ def get_logger(log_level: str) -> logging.Logger:
     return logger
 
 
+class SentenceEmbedder:
+    """
+    Embeds texts with a sentence-transformers model, encoding in batches. The
+    model runs on the GPU when one is available unless a device is given, and
+    is only loaded the first time something needs to be embedded.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        batch_size: int = 64,
+        device: Optional[str] = None,
+        max_seq_length: int = 256,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = device
+        self.max_seq_length = max_seq_length
+        self._model = None
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            # importing sentence_transformers pulls in torch, only pay for it when used
+            import torch
+            from sentence_transformers import SentenceTransformer
+
+            device = self.device
+            if device is None:
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+
+            self._model = SentenceTransformer(self.model_name, device=device)
+            self._model.max_seq_length = self.max_seq_length
+        return self._model
+
+    def embed_text(self, chunks: List[str]) -> np.ndarray:
+        # unit length vectors let the index rank by inner product alone
+        return self.model.encode(
+            chunks,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+
+
+class EmbeddingCache:
+    """
+    LRU cache in front of an embedder, keyed by the SHA-256 digest of
+    the text. Repeated texts within a batch are encoded once and only the cache
+    misses are sent to the wrapped embedder.
+    """
+
+    def __init__(self, embedder: Any, maxsize: int = 4096):
+        self.embedder = embedder
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+
+    def embed_text(self, chunks: List[str]) -> List[np.ndarray]:
+        digests = [hashlib.sha256(chunk.encode()).digest() for chunk in chunks]
+
+        misses: Dict[bytes, str] = {}
+        for digest, chunk in zip(digests, chunks):
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+            else:
+                misses[digest] = chunk
+
+        if misses:
+            embeddings = self.embedder.embed_text(list(misses.values()))
+            for digest, embedding in zip(misses.keys(), embeddings):
+                self._cache[digest] = np.asarray(embedding, dtype=np.float32)
+
+        results = [self._cache[digest] for digest in digests]
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return results
+
+
+class VectorIndex:
+    """
+    HNSW approximate nearest neighbour index over the normalized chunk
+    embeddings, ranked by inner product and stored as 8-bit scalar quantized
+    codes. The chunks and their metadata are kept in a list aligned with the
+    faiss ids. The faiss index is built on the first add, sized to the vectors.
+    """
+
+    def __init__(
+        self,
+        m: int = 32,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        min_train_size: int = 256,
+    ):
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.min_train_size = min_train_size
+        self.index = None
+        self.entries: List[Dict[str, Any]] = []
+        # vectors added before the quantizer has been trained
+        self._untrained: List[np.ndarray] = []
+
+    def _build_index(self, dim: int) -> None:
+        # the embeddings are normalized, so inner product equals cosine similarity
+        self.index = faiss.IndexHNSWSQ(
+            dim, faiss.ScalarQuantizer.QT_8bit, self.m, faiss.METRIC_INNER_PRODUCT
+        )
+        self.index.hnsw.efConstruction = self.ef_construction
+        self.index.hnsw.efSearch = self.ef_search
+
+    def add(self, vectors: np.ndarray, entries: List[Dict[str, Any]]) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.index is None:
+            self._build_index(vectors.shape[1])
+        self.entries.extend(entries)
+        if self.index.is_trained:
+            self.index.add(vectors)
+            return
+
+        self._untrained.append(vectors)
+        if sum(len(v) for v in self._untrained) >= self.min_train_size:
+            self._train()
+
+    def _train(self) -> None:
+        # the quantizer learns the per dimension value range, a single small
+        # batch from one page would give it a too narrow range
+        vectors = np.vstack(self._untrained)
+        self._untrained = []
+        self.index.train(vectors)
+        self.index.add(vectors)
+
+    def search(self, vector: np.ndarray, top_n: int) -> List[Dict[str, Any]]:
+        if self._untrained:
+            self._train()
+        if self.index is None or self.index.ntotal == 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        similarities, ids = self.index.search(query, top_n)
+        return [
+            {**self.entries[idx], "similarity": float(similarity)}
+            for idx, similarity in zip(ids[0], similarities[0])
+            if idx != -1
+        ]
+
+
+class SemanticCache:
+    """
+    Two-tier answer cache for the search-extract-summarize flow: an exact match
+    on the SHA-256 of the query, then a cosine similarity lookup over the query
+    embedding in a sqlite-vec table. Entries are namespaced by the search
+    parameters so that answers for different sites or dates do not mix. An
+    exact hit never calls the embedder, so it does not load the model.
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(
+        self,
+        db_path: str,
+        embed: Callable[[str], List[float]],
+        ttl: int = 24 * 3600,
+        threshold: float = 0.92,
+        max_entries: int = 1000,
+    ):
+        self.embed = embed
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        try:
+            self.db.enable_load_extension(True)
+            sqlite_vec.load(self.db)
+            self.db.enable_load_extension(False)
+        except (AttributeError, sqlite3.OperationalError):
+            self.db.close()
+            raise
+
+        # files written before the current schema are dropped and rebuilt
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version < self.SCHEMA_VERSION:
+            self.db.execute("DROP TABLE IF EXISTS qcache_exact")
+            self.db.execute("DROP TABLE IF EXISTS vec_qcache")
+            self.db.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+        # qcache_exact holds the answers, vec_qcache rows share its rowids
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS qcache_exact "
+            "(key TEXT PRIMARY KEY, response TEXT, ts INTEGER, last_used INTEGER)"
+        )
+        self.db.commit()
+
+    def _embed(self, query: str) -> bytes:
+        vector = self.embed(query)
+        # the vector table is sized by the embedder, create it on first use
+        self.db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS vec_qcache USING vec0("
+            "namespace TEXT partition key, "
+            f"embedding FLOAT[{len(vector)}] distance_metric=cosine, "
+            "ts INTEGER)"
+        )
+        return sqlite_vec.serialize_float32(vector)
+
+    @staticmethod
+    def _exact_key(query: str, namespace: str) -> str:
+        return hashlib.sha256(f"{namespace}\n{query}".encode()).hexdigest()
+
+    def _touch(self, rowid: int) -> None:
+        self.db.execute(
+            "UPDATE qcache_exact SET last_used = ? WHERE rowid = ?",
+            (int(time.time()), rowid),
+        )
+        self.db.commit()
+
+    def get(self, query: str, namespace: str) -> Optional[str]:
+        min_ts = int(time.time()) - self.ttl
+
+        row = self.db.execute(
+            "SELECT rowid, response FROM qcache_exact WHERE key = ? AND ts >= ?",
+            (self._exact_key(query, namespace), min_ts),
+        ).fetchone()
+        if row is not None:
+            self._touch(row[0])
+            return row[1]
+
+        # filter on ts inside the KNN so an expired neighbour cannot hide a fresh one
+        row = self.db.execute(
+            "SELECT rowid, distance FROM vec_qcache "
+            "WHERE embedding MATCH ? AND k = 1 AND namespace = ? AND ts >= ?",
+            (self._embed(query), namespace, min_ts),
+        ).fetchone()
+        if row is None:
+            return None
+        rowid, distance = row
+        # cosine distance is 1 - cosine similarity
+        if 1 - distance < self.threshold:
+            return None
+
+        row = self.db.execute(
+            "SELECT response FROM qcache_exact WHERE rowid = ?", (rowid,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._touch(rowid)
+        return row[0]
+
+    def _delete(self, rowids: List[int]) -> None:
+        for rowid in rowids:
+            self.db.execute("DELETE FROM vec_qcache WHERE rowid = ?", (rowid,))
+            self.db.execute("DELETE FROM qcache_exact WHERE rowid = ?", (rowid,))
+
+    def put(self, query: str, namespace: str, response: str) -> None:
+        now = int(time.time())
+        key = self._exact_key(query, namespace)
+        embedding = self._embed(query)
+
+        expired = self.db.execute(
+            "SELECT rowid FROM qcache_exact WHERE ts < ? OR key = ?",
+            (now - self.ttl, key),
+        ).fetchall()
+        self._delete([rowid for (rowid,) in expired])
+
+        cursor = self.db.execute(
+            "INSERT INTO qcache_exact (key, response, ts, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            (key, response, now, now),
+        )
+        self.db.execute(
+            "INSERT INTO vec_qcache (rowid, namespace, embedding, ts) "
+            "VALUES (?, ?, ?, ?)",
+            (cursor.lastrowid, namespace, embedding, now),
+        )
+
+        # evict the least recently used answers beyond the cap
+        evicted = self.db.execute(
+            "SELECT rowid FROM qcache_exact ORDER BY last_used DESC, rowid DESC "
+            "LIMIT -1 OFFSET ?",
+            (self.max_entries,),
+        ).fetchall()
+        self._delete([rowid for (rowid,) in evicted])
+        self.db.commit()
+
+
 class Ask:
 
     def __init__(self, logger: Optional[logging.Logger] = None):
@@ -30,9 +373,22 @@ class Ask:
         else:
             self.logger = get_logger("INFO")
 
-        from vectordb import Memory
+        # hosts that failed a HEAD probe, their pages are fetched without one
+        self._head_unsupported_hosts: Set[str] = set()
+
+        # reuse connections to the search API across calls
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=20,
+                pool_maxsize=20,
+                max_retries=Retry(total=2, backoff_factor=0.3),
+            ),
+        )
 
-        self.memory = Memory()
+        self.embedder = EmbeddingCache(SentenceEmbedder(device=self.embedding_device))
+        self.index = VectorIndex()
 
     def read_env_variables(self) -> None:
         err_msg = ""
@@ -54,7 +410,16 @@ class Ask:
         if self.llm_base_url is None:
             self.llm_base_url = "https://api.openai.com/v1"
 
-    def search_web(self, query: str, date_restrict: int, target_site: str) -> List[str]:
+        # e.g. "cpu" or "cuda:1", picked automatically when not set
+        self.embedding_device = os.environ.get("EMBEDDING_DEVICE")
+
+        self.cache_db_path = os.environ.get("CACHE_DB_PATH")
+        if self.cache_db_path is None:
+            self.cache_db_path = os.path.expanduser("~/.cache/ask.py/qcache.db")
+
+    def search_web(
+        self, query: str, date_restrict: int, target_site: str, num_pages: int = 1
+    ) -> List[str]:
         escaped_query = urllib.parse.quote(query)
         url_base = (
             f"https://www.googleapis.com/customsearch/v1?key={self.search_api_key}"
@@ -69,103 +434,237 @@ class Ask:
 
         self.logger.debug(f"Searching for query: {query}")
 
-        resp = requests.get(url)
+        # the search API returns at most 10 results per call, fetch the pages
+        # concurrently over the pooled session
+        starts = [1 + 10 * page for page in range(num_pages)]
+        with ThreadPoolExecutor(max_workers=num_pages) as executor:
+            futures = [
+                executor.submit(self._search_page, f"{url}&start={start}")
+                for start in starts
+            ]
+
+        pages: List[List[str]] = []
+        errors: List[Exception] = []
+        for start, future in zip(starts, futures):
+            try:
+                pages.append(future.result())
+            except Exception as e:
+                self.logger.error(f"search error for page start={start}: {e}")
+                errors.append(e)
+        # a late page failing should not discard the pages that did succeed
+        if len(pages) == 0 and len(errors) > 0:
+            raise errors[0]
+
+        # different pages can return the same link, keep the first occurrence
+        found_links = list(dict.fromkeys(link for page in pages for link in page))
+        if len(found_links) == 0:
+            self.logger.warning(f"No result items in the response for query: {query}")
+        return found_links
 
+    def _search_page(self, url: str) -> List[str]:
+        # the api key is part of the url, keep it out of logs and errors
+        page_url = url.replace(self.search_api_key, "***")
+
+        # leaving the block returns the connection to the keep-alive pool, also
+        # when parsing the streamed body fails
+        with self.session.get(url, stream=True, timeout=10) as resp:
+            return self._read_search_page(resp, page_url)
+
+    def _read_search_page(self, resp: requests.Response, page_url: str) -> List[str]:
         if resp is None:
             raise Exception("No response from search API")
 
-        search_results_dict = json.loads(resp.text)
-        if "error" in search_results_dict:
+        if resp.status_code != 200:
+            # error responses are small, parse them in full for the message
+            try:
+                search_results_dict = orjson.loads(resp.content)
+            except orjson.JSONDecodeError:
+                # e.g. an HTML page from a proxy for a 502 or 503
+                raise Exception(
+                    f"Error in search API response for {page_url}: "
+                    f"HTTP {resp.status_code}: {resp.text[:200]}"
+                )
+            if isinstance(search_results_dict, dict):
+                search_results_dict = search_results_dict.get(
+                    "error", search_results_dict
+                )
             raise Exception(
-                f"Error in search API response: {search_results_dict['error']}"
+                f"Error in search API response for {page_url}: "
+                f"HTTP {resp.status_code}: {search_results_dict}"
             )
 
-        if "searchInformation" not in search_results_dict:
+        # stream only the result links out of the response body, the top level
+        # keys are tracked so the baseline response checks still apply
+        resp.raw.decode_content = True
+        found_links = []
+        top_keys = set()
+        error = ijson.ObjectBuilder()
+        try:
+            for prefix, event, value in ijson.parse(resp.raw):
+                if prefix == "" and event == "map_key":
+                    top_keys.add(value)
+                elif prefix == "error" or prefix.startswith("error."):
+                    error.event(event, value)
+                elif prefix == "items.item.link":
+                    if value is None or value == "":
+                        self.logger.warning(
+                            f"Search result link missing in page: {page_url}"
+                        )
+                        continue
+                    found_links.append(value)
+        except ijson.JSONError as e:
+            raise Exception(f"Error in search API response for {page_url}: {e}")
+
+        if "error" in top_keys:
             raise Exception(
-                f"No search information in search API response: {resp.text}"
+                f"Error in search API response for {page_url}: {error.value}"
+            )
+        if "searchInformation" not in top_keys:
+            raise Exception(
+                f"No search information in search API response for {page_url}"
             )
-
-        total_results = search_results_dict["searchInformation"].get("totalResults", 0)
-        if total_results == 0:
-            self.logger.warning(f"No results found for query: {query}")
-            return []
-
-        results = search_results_dict.get("items", [])
-        if results is None or len(results) == 0:
-            self.logger.warning(f"No result items in the response for query: {query}")
-            return []
-
-        found_links = []
-        for result in results:
-            link = result.get("link", None)
-            if link is None or link == "":
-                self.logger.warning(f"Search result link missing: {result}")
-                continue
-            found_links.append(link)
         return found_links
 
-    def scrape_urls(self, urls: List[str]) -> Dict[str, str]:
-        session = requests.Session()
+    async def _probe_html(self, session: aiohttp.ClientSession, url: str) -> bool:
+        parsed_url = urllib.parse.urlparse(url)
+        if parsed_url.path.lower().endswith(_NON_HTML_EXTENSIONS):
+            return False
+
+        host = parsed_url.netloc
+        if host in self._head_unsupported_hosts:
+            return True
+
+        # a HEAD request is cheap compared to downloading a large binary body
+        try:
+            async with session.head(
+                url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=3)
+            ) as response:
+                if response.status in (404, 410):
+                    return False
+                if response.status in (405, 501):
+                    # the server does not support HEAD, let the GET decide
+                    self._head_unsupported_hosts.add(host)
+                    return True
+                content_type = response.headers.get("Content-Type", "")
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self._head_unsupported_hosts.add(host)
+            return True
+
+        mime_type = content_type.split(";")[0].strip().lower()
+        return mime_type == "" or mime_type in _HTML_CONTENT_TYPES
+
+    async def _scrape_urls_async(
+        self, urls: List[str], max_concurrency: int = 8
+    ) -> Dict[str, str]:
         user_agent: str = (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
             "AppleWebKit/537.36 (KHTML, like Gecko) "
             "Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0"
         )
-        session.headers.update({"User-Agent": user_agent})
+        semaphore = asyncio.Semaphore(max_concurrency)
+        loop = asyncio.get_running_loop()
+
+        async def fetch(session: aiohttp.ClientSession, url: str) -> Optional[str]:
+            async with semaphore:
+                if not await self._probe_html(session, url):
+                    self.logger.debug(f"Skipping non-HTML url: {url}")
+                    return None
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    content = await response.read()
+            # lexbor parses a page in tens of milliseconds, a worker thread keeps
+            # that off the event loop without the start up cost of processes
+            body_text = await loop.run_in_executor(None, _extract_body, content)
+            if body_text is None:
+                self.logger.warning(f"No body text in the response for url: {url}")
+            else:
+                self.logger.debug(f"Scraped {url}: {body_text}...")
+            return body_text
+
+        async with aiohttp.ClientSession(
+            headers={"User-Agent": user_agent},
+            timeout=aiohttp.ClientTimeout(total=10),
+        ) as session:
+            results = await asyncio.gather(
+                *[fetch(session, url) for url in urls], return_exceptions=True
+            )
 
         # the key is the url and the value is the body text
         scrape_results: Dict[str, str] = {}
-
-        for url in urls:
-            try:
-                response = session.get(url, timeout=10)
-                soup = BeautifulSoup(response.content, "lxml", from_encoding="utf-8")
-
-                body_tag = soup.body
-                if body_tag:
-                    body_text = body_tag.get_text()
-                    body_text = " ".join(body_text.split()).strip()
-                    scrape_results[url] = body_text
-                    self.logger.debug(f"Scraped {url}: {body_text}...")
-                else:
-                    self.logger.warning(
-                        f"No body tag found in the response for url: {url}"
-                    )
-            except Exception as e:
-                self.logger.error(f"scraping error {url}: {e}")
+        for url, result in zip(urls, results):
+            if isinstance(result, BaseException):
+                self.logger.error(f"scraping error {url}: {result}")
                 continue
+            if result is not None:
+                scrape_results[url] = result
         return scrape_results
 
     def chunk_results(
         self, scrape_results: Dict[str, str], size: int, overlap: int
-    ) -> Dict[str, List[str]]:
-        chunking_results: Dict[str, List[str]] = {}
+    ) -> Iterator[Tuple[str, int, str]]:
+        # yields (url, chunk index, chunk text) so chunks stream into the embedder
         for url, text in scrape_results.items():
-            chunks = []
-            for pos in range(0, len(text), size - overlap):
-                chunks.append(text[pos : pos + size])
-            chunking_results[url] = chunks
-        return chunking_results
+            starts = np.arange(0, len(text), size - overlap, dtype=np.int64)
+            ends = np.minimum(starts + size, len(text))
+            for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+                chunk = text[start:end]
+                self.logger.debug(f"URL: {url} Chunk {i+1}: {chunk}")
+                yield url, i, chunk
+
+    def save_to_db(
+        self, chunks: Iterable[Tuple[str, int, str]], batch_size: int = 64
+    ) -> int:
+        # chunks are embedded every batch_size texts, so only one batch of float32
+        # embeddings exists at a time; the page bodies in scrape_results and the
+        # chunk strings kept in the index for retrieval are still held in full
+        texts: List[str] = []
+        entries: List[Dict[str, Any]] = []
+
+        def flush() -> None:
+            vectors = np.vstack(self.embedder.embed_text(texts))
+            self.index.add(vectors, entries)
+            texts.clear()
+            entries.clear()
+
+        # boilerplate such as navigation and footers repeats across pages, only
+        # embed each distinct chunk once and record every place it was seen
+        seen: Dict[bytes, Dict[str, Any]] = {}
+        for url, i, chunk in chunks:
+            digest = _chunk_digest(chunk)
+            if digest in seen:
+                seen[digest]["metadata"]["refs"].append({"url": url, "chunk": i})
+                continue
 
-    def save_to_db(self, chunking_results: Dict[str, List[str]]) -> None:
-        for url, chunks in chunking_results.items():
-            for i, chunk in enumerate(chunks):
-                self.memory.save(texts=chunk, metadata={"url": url, "chunk": i})
+            ref = {"url": url, "chunk": i}
+            entry = {"chunk": chunk, "metadata": {**ref, "refs": [ref]}}
+            seen[digest] = entry
+            texts.append(chunk)
+            entries.append(entry)
+            if len(texts) >= batch_size:
+                flush()
+        if texts:
+            flush()
+        return len(seen)
 
     def vector_search(self, query: str) -> List[Dict[str, Any]]:
-        results = self.memory.search(query, top_n=10)
-        return results
+        query_vector = self.embedder.embed_text([query])[0]
+        return self.index.search(query_vector, top_n=10)
 
     def _get_chat_model(self, model_name: str) -> ChatOpenAI:
         return ChatOpenAI(
             model_name=model_name,
             openai_api_key=self.llm_api_key,
             openai_api_base=self.llm_base_url,
-            temperature=0
+            temperature=0,
+            streaming=True,
         )
 
     def run_inference(
-        self, query: str, model_name: str, matched_chunks: List[Dict[str, Any]]
+        self,
+        query: str,
+        model_name: str,
+        matched_chunks: List[Dict[str, Any]],
+        on_token: Optional[Callable[[str], None]] = None,
     ) -> str:
         system_prompt = SystemMessage(
             content="You are expert summarizing the answers based on the provided contents."
@@ -186,9 +685,9 @@ information about the query, please write "No related information found in the c
 Here is the context:
 {context}
 """
-        context = ""
-        for i, chunk in enumerate(matched_chunks):
-            context += f"[{i+1}] {chunk['chunk']}\n"
+        context = "".join(
+            f"[{i+1}] {chunk['chunk']}\n" for i, chunk in enumerate(matched_chunks)
+        )
 
         human_message = HumanMessage(
             content=user_prompt_template.format(query=query, context=context)
@@ -198,12 +697,16 @@ Here is the context:
         self.logger.debug(f"Final user prompt: {human_message.content}")
 
         chat = self._get_chat_model(model_name)
-        response = chat([system_prompt, human_message])
+        tokens: List[str] = []
+        for chunk in chat.stream([system_prompt, human_message]):
+            tokens.append(chunk.content)
+            if on_token is not None:
+                on_token(chunk.content)
 
-        if response is None:
+        if len(tokens) == 0:
             raise Exception("No completion from the API")
 
-        return response.content
+        return "".join(tokens)
 
 
 @click.command(help="Search web for the query and summarize the results")
@@ -230,6 +733,21 @@ Here is the context:
     default="gpt-4o-mini",
     help="Model name to use for inference",
 )
+@click.option(
+    "--num-pages",
+    "-n",
+    type=click.IntRange(1, 10),
+    required=False,
+    default=1,
+    help="Number of search result pages (10 links each) to fetch",
+)
+@click.option(
+    "--no-cache",
+    "no_cache",
+    is_flag=True,
+    default=False,
+    help="Skip the semantic answer cache and always run the full flow",
+)
 @click.option(
     "-l",
     "--log-level",
@@ -240,30 +758,50 @@ Here is the context:
     show_default=True,
 )
 def search_extract_summarize(
-    query: str, date_restrict: int, target_site: str, model_name: str, log_level: str
+    query: str,
+    date_restrict: int,
+    target_site: str,
+    model_name: str,
+    num_pages: int,
+    no_cache: bool,
+    log_level: str,
 ):
     logger = get_logger(log_level)
 
     ask = Ask(logger=logger)
+
+    cache = None
+    namespace = f"{target_site or ''}|{date_restrict or ''}|{num_pages}|{model_name}"
+    if not no_cache:
+        try:
+            cache = SemanticCache(
+                ask.cache_db_path,
+                embed=lambda text: ask.embedder.embed_text([text])[0],
+            )
+        except (AttributeError, sqlite3.OperationalError) as e:
+            # sqlite3 builds without extension loading cannot use sqlite-vec
+            logger.warning(f"Answer cache disabled, cannot load sqlite-vec: {e}")
+    if cache is not None:
+        cached_output = cache.get(query, namespace)
+        if cached_output is not None:
+            logger.info("✅ Found a cached answer for the query")
+            click.echo(cached_output, nl=False)
+            return
+
     logger.info("✅ Searching the web ...")
-    links = ask.search_web(query, date_restrict, target_site)
+    links = ask.search_web(query, date_restrict, target_site, num_pages)
     logger.info(f"✅ Found {len(links)} links for query: {query}")
     for i, link in enumerate(links):
         logger.debug(f"{i+1}. {link}")
 
     logger.info("✅ Scraping the URLs ...")
-    scrape_results = ask.scrape_urls(links)
+    scrape_results = asyncio.run(ask._scrape_urls_async(links))
     logger.info(f"✅ Scraped {len(scrape_results)} URLs ...")
 
-    logger.info("✅ Chunking the text ...")
-    chunking_results = ask.chunk_results(scrape_results, 1000, 100)
-    for url, chunks in chunking_results.items():
-        logger.debug(f"URL: {url}")
-        for i, chunk in enumerate(chunks):
-            logger.debug(f"Chunk {i+1}: {chunk}")
-
-    logger.info("✅ Saving to vector DB ...")
-    ask.save_to_db(chunking_results)
+    logger.info("✅ Chunking the text and saving to vector DB ...")
+    chunks = ask.chunk_results(scrape_results, 1000, 100)
+    saved = ask.save_to_db(chunks)
+    logger.info(f"✅ Saved {saved} chunks to vector DB ...")
 
     logger.info("✅ Querying the vector DB to get context ...")
     results = ask.vector_search(query)
@@ -271,12 +809,22 @@ def search_extract_summarize(
         logger.debug(f"{i+1}. {result}")
 
     logger.info("✅ Running inference with context ...")
-    answer = ask.run_inference(query, model_name, results)
+    # print the answer as the tokens arrive, the references follow at the end
+    click.echo("# Answer\n\n", nl=False)
+    answer = ask.run_inference(
+        query, model_name, results, on_token=lambda token: click.echo(token, nl=False)
+    )
     logger.info("✅ Finished inference, generating output ...")
-    click.echo("# Answer\n\n{}\n".format(answer))
-    click.echo("# References")
-    for i, result in enumerate(results):
-        click.echo(f"[{i+1}] {result['metadata']['url']}")
+
+    references = "\n\n# References\n" + "".join(
+        f"[{i+1}] {result['metadata']['url']}\n" for i, result in enumerate(results)
+    )
+    click.echo(references, nl=False)
+
+    output = "# Answer\n\n{}{}".format(answer, references)
+
+    if cache is not None:
+        cache.put(query, namespace, output)
 
 
 if __name__ == "__main__":